@@ -0,0 +1,20 @@
+from torch.utils.data import Dataset
+from src.data.market_dataset import MarketDataset
+
+
+class DualDataset(Dataset):
+    # Pairs the 15m and 1h datasets so a single DataLoader (and worker
+    # pool) serves both timeframes per iteration
+
+    def __init__(self, dataset_15m: MarketDataset, dataset_1h: MarketDataset):
+        self.dataset_15m = dataset_15m
+        self.dataset_1h = dataset_1h
+
+    def __len__(self):
+        return min(len(self.dataset_15m), len(self.dataset_1h))
+
+    def __getitem__(self, idx):
+        sequence_15m, target_15m = self.dataset_15m[idx]
+        sequence_1h, target_1h = self.dataset_1h[idx]
+
+        return sequence_15m, target_15m, sequence_1h, target_1h
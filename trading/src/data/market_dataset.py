@@ -1,72 +1,205 @@
+import hashlib
+import json
+import os
+import time
 import torch
 from torch.utils.data import Dataset
+import numba
 import numpy as np
-import pandas as pd
-from sklearn.preprocessing import MinMaxScaler
-from src.config.database import SessionLocal
+from numpy.lib.stride_tricks import sliding_window_view
+import psycopg
+from src.config.database import DATABASE_URL
 from datetime import datetime
 
 
+@numba.njit(parallel=True, cache=True)
+def fill_nans(a):
+    # Forward-fill then backward-fill each column in one compiled pass
+    n, m = a.shape
+    for j in numba.prange(m):
+        last = np.float32(0.0)
+        seen = False
+        for i in range(n):
+            v = a[i, j]
+            if np.isnan(v):
+                if seen:
+                    a[i, j] = last
+            else:
+                last = v
+                seen = True
+
+        last = np.float32(0.0)
+        seen = False
+        for i in range(n - 1, -1, -1):
+            v = a[i, j]
+            if np.isnan(v):
+                if seen:
+                    a[i, j] = last
+            else:
+                last = v
+                seen = True
+
+
 class MarketDataset(Dataset):
+    FEATURES = (
+        'open', 'close', 'high', 'low', 'volume', 'trades',
+        'rsi_14', 'macd_line', 'macd_signal', 'macd_histogram',
+        'bb_upper', 'bb_middle', 'bb_lower', 'atr_14',
+        'volatility_1h', 'volatility_24h',
+        'price_change_1h', 'price_change_24h',
+        'volume_change_1h', 'volume_change_24h'
+    )
+    NUM_FEATURES = len(FEATURES)
+    CACHE_DIR = 'data/cache'
+    CACHE_TTL_SECONDS = 6 * 3600
+
     def __init__(self, timeframe_id: str, start_time: datetime, end_time: datetime):
-        self.session = SessionLocal()
-        self.data = self._fetch_market_data(timeframe_id, start_time, end_time)
         self.sequence_length = 100
-        self.scaler = MinMaxScaler()
-        self._preprocess_data()
+        self.data_min = None
+        self.data_max = None
+
+        # Round the window bounds to the hour so callers passing a fresh
+        # utcnow() still hit the same cache entry within the TTL
+        key_start = start_time.replace(minute=0, second=0, microsecond=0)
+        key_end = end_time.replace(minute=0, second=0, microsecond=0)
+        cache_key = hashlib.md5(
+            f"{timeframe_id}|{key_start.isoformat()}|{key_end.isoformat()}"
+            .encode()
+        ).hexdigest()
+        self._cache_path = os.path.join(
+            self.CACHE_DIR, f"market_{cache_key}.npy")
+        self._meta_path = os.path.join(
+            self.CACHE_DIR, f"market_{cache_key}.json")
+
+        if self._cache_valid():
+            # Memory-map the preprocessed matrix; copy-on-write so the
+            # views below stay writable, shared with forked DataLoader
+            # workers, no SQL round trip
+            self.data = np.load(self._cache_path, mmap_mode='c')
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+            self.data_min = np.array(meta['min'], dtype=np.float32)
+            self.data_range = np.array(meta['range'], dtype=np.float32)
+            self._build_windows()
+        else:
+            self.data = self._fetch_market_data(
+                timeframe_id, start_time, end_time)
+            self._preprocess_data()
+            self._write_cache()
+
+    def _cache_valid(self):
+        if not (os.path.exists(self._cache_path)
+                and os.path.exists(self._meta_path)):
+            return False
+
+        age = time.time() - os.path.getmtime(self._cache_path)
+        return age < self.CACHE_TTL_SECONDS
+
+    def _prune_cache(self):
+        # Drop expired entries so data/cache doesn't grow without bound
+        for name in os.listdir(self.CACHE_DIR):
+            path = os.path.join(self.CACHE_DIR, name)
+            if time.time() - os.path.getmtime(path) >= self.CACHE_TTL_SECONDS:
+                os.remove(path)
+
+    def _write_cache(self):
+        os.makedirs(self.CACHE_DIR, exist_ok=True)
+        self._prune_cache()
+        np.save(self._cache_path, self.data)
+        with open(self._meta_path, 'w') as f:
+            json.dump({
+                'min': self.data_min.tolist(),
+                'range': self.data_range.tolist()
+            }, f)
 
     def _fetch_market_data(self, timeframe_id: str, start_time: datetime, end_time: datetime):
-        query = """
-            SELECT
-                open, close, high, low, volume, trades,
-                rsi_14, macd_line, macd_signal, macd_histogram,
-                bb_upper, bb_middle, bb_lower, atr_14,
-                volatility_1h, volatility_24h,
-                price_change_1h, price_change_24h,
-                volume_change_1h, volume_change_24h
-            FROM MarketData
+        filters = """
             WHERE timeframe_id = %(timeframe_id)s
             AND open_time BETWEEN %(start_time)s AND %(end_time)s
             AND usable_by_model = true
-            ORDER BY open_time ASC
         """
+        count_query = f"SELECT COUNT(*) FROM MarketData {filters}"
+        # Cast everything to float8 so the binary COPY stream is uniform
+        select_list = ", ".join(f"{column}::float8"
+                                for column in self.FEATURES)
+        copy_query = f"""
+            COPY (
+                SELECT {select_list}
+                FROM MarketData
+                {filters}
+                ORDER BY open_time ASC
+            ) TO STDOUT WITH (FORMAT BINARY)
+        """
+        params = {
+            "timeframe_id": timeframe_id,
+            "start_time": start_time,
+            "end_time": end_time
+        }
 
-        df = pd.read_sql(
-            query,
-            self.session.bind,
-            params={
-                "timeframe_id": timeframe_id,
-                "start_time": start_time,
-                "end_time": end_time
-            }
-        )
-        return df
+        # Size the buffer up front, then COPY the rows in binary straight
+        # into it: no ORM, no DataFrame, no per-cell Python objects
+        with psycopg.connect(DATABASE_URL) as conn:
+            # One REPEATABLE READ snapshot covers both statements, so the
+            # COPY can never return more rows than COUNT(*) sized for
+            conn.isolation_level = psycopg.IsolationLevel.REPEATABLE_READ
+            with conn.cursor() as cur:
+                cur.execute(count_query, params)
+                num_rows = cur.fetchone()[0]
+                out = np.empty(
+                    (num_rows, self.NUM_FEATURES), dtype=np.float32)
+
+                offset = 0
+                with cur.copy(copy_query, params) as copy_data:
+                    copy_data.set_types(["float8"] * self.NUM_FEATURES)
+                    for row in copy_data.rows():
+                        if None in row:
+                            row = tuple(
+                                np.nan if v is None else v for v in row)
+                        out[offset] = row
+                        offset += 1
+
+        out = out[:offset]
+
+        # Per-column min/max before the fill; fmin/fmax ignore NaNs, and
+        # filling only repeats existing values, so the extrema are exact
+        self.data_min = np.fmin.reduce(out, axis=0)
+        self.data_max = np.fmax.reduce(out, axis=0)
+
+        fill_nans(out)
+
+        return out
 
     def _preprocess_data(self):
         print("Raw data shape:", self.data.shape)
-        print("Missing values:\n", self.data.isna().sum())
-        print("Data sample:\n", self.data.head())
 
-        # Fill missing values with forward fill, then backward fill
-        self.data = self.data.ffill().bfill()
+        # Scale in place with the streamed min/range, no intermediates
+        self.data_range = self.data_max - self.data_min
+        self.data_range[self.data_range == 0] = 1
+        np.subtract(self.data, self.data_min, out=self.data)
+        np.divide(self.data, self.data_range, out=self.data)
+
+        # Clean any NaNs left by all-NaN columns here, once, instead of
+        # per-forward in the model
+        np.nan_to_num(self.data, copy=False)
 
-        # Convert to numpy array
-        self.data = self.data.values
+        self._build_windows()
 
-        # Scale the data
-        self.data = self.scaler.fit_transform(self.data)
+    def _build_windows(self):
+        # All length-100 windows as one strided view: item fetch is pure
+        # stride math, no per-sample slicing or allocation. The base array
+        # is owned (or copy-on-write mapped), so the view can stay writable
+        # and torch.from_numpy doesn't warn about read-only memory
+        self.windows = sliding_window_view(
+            self.data, (self.sequence_length, self.data.shape[1]),
+            writeable=True)[:, 0]
+        # Next close price per window
+        self.targets = self.data[self.sequence_length:, 0]
 
     def __len__(self):
         return len(self.data) - self.sequence_length
 
     def __getitem__(self, idx):
-        sequence = self.data[idx:idx + self.sequence_length]
-        target = self.data[idx + self.sequence_length, 0]  # Next close price
-
         return (
-            torch.FloatTensor(sequence),
-            torch.FloatTensor([target])
+            torch.from_numpy(self.windows[idx]),
+            torch.from_numpy(self.targets[idx:idx + 1])
         )
-
-    def __del__(self):
-        self.session.close()
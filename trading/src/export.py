@@ -0,0 +1,34 @@
+import os
+
+import torch
+
+from src.models.ensemble import TimeseriesEnsemble
+
+
+def export_onnx(checkpoint_path, output_path, input_size=20, hidden_size=128):
+    if not os.path.exists(checkpoint_path):
+        raise FileNotFoundError(
+            f"Checkpoint {checkpoint_path} not found. Pre-TCN checkpoints "
+            "are incompatible; retrain with src/main.py before exporting.")
+
+    model = TimeseriesEnsemble(input_size=input_size, hidden_size=hidden_size)
+    model.load_state_dict(torch.load(
+        checkpoint_path, map_location='cpu', weights_only=True, mmap=True))
+    model.eval()
+
+    dummy_input = torch.randn(1, 1, input_size)
+    torch.onnx.export(
+        model,
+        dummy_input,
+        output_path,
+        input_names=['x'],
+        output_names=['logits'],
+        opset_version=17,
+        dynamic_axes={'x': {0: 'batch'}, 'logits': {0: 'batch'}}
+    )
+    print(f"Exported {checkpoint_path} -> {output_path}")
+
+
+if __name__ == "__main__":
+    export_onnx('models/saved/epoch_0_15m.pth', 'models/saved/epoch_0_15m.onnx')
+    export_onnx('models/saved/epoch_0_1h.pth', 'models/saved/epoch_0_1h.onnx')
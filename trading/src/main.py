@@ -6,8 +6,8 @@ from dotenv import load_dotenv
 
 from src.models.ensemble import TimeseriesEnsemble
 from src.data.market_dataset import MarketDataset
+from src.data.dual_dataset import DualDataset
 from src.services.trainer import DualTimeframeTrainer
-from src.config.database import SessionLocal
 from src.utils.logger import setup_logger
 
 load_dotenv()
@@ -36,17 +36,15 @@ def main():
         end_time=end_time
     )
 
-    # Create data loaders
-    train_loader_15m = DataLoader(
-        dataset_15m,
+    # One loader (and worker pool) serves both timeframes
+    train_loader = DataLoader(
+        DualDataset(dataset_15m, dataset_1h),
         batch_size=32,
-        shuffle=True
-    )
-
-    train_loader_1h = DataLoader(
-        dataset_1h,
-        batch_size=32,
-        shuffle=True
+        shuffle=True,
+        num_workers=2,
+        pin_memory=torch.cuda.is_available(),
+        persistent_workers=True,
+        prefetch_factor=2
     )
 
     # Initialize trainer
@@ -56,14 +54,18 @@ def main():
         learning_rate=1e-4
     )
 
+    # Pay the torch.compile cost once before the real loop
+    trainer.warmup(batch_size=32)
+
     # Training loop
     NUM_EPOCHS = 10
     for epoch in range(NUM_EPOCHS):
-        train_loss = trainer.train_epoch(train_loader_15m, train_loader_1h)
-        val_loss = trainer.validate(train_loader_15m, train_loader_1h)
+        train_loss = trainer.train_epoch(train_loader)
+        val_loss = trainer.validate(train_loader)
 
-        logger.info(f"Epoch {epoch}: Train Loss = {
-                    train_loss:.4f}, Val Loss = {val_loss:.4f}")
+        logger.info(
+            f"Epoch {epoch}: Train Loss = {train_loss:.4f}, "
+            f"Val Loss = {val_loss:.4f}")
 
         # Save models periodically
         if epoch % 10 == 0:
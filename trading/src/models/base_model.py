@@ -8,5 +8,12 @@ class BaseModel(nn.Module):
     def save(self, path):
         torch.save(self.state_dict(), path)
         
-    def load(self, path):
-        self.load_state_dict(torch.load(path))
+    def load(self, path, map_location=None):
+        # mmap avoids a full host-side copy of the checkpoint; assign adopts
+        # the mapped tensors, so map them to the module's device first or
+        # a CUDA-resident model would silently end up on CPU
+        if map_location is None:
+            map_location = next(self.parameters()).device
+        state_dict = torch.load(
+            path, map_location=map_location, weights_only=True, mmap=True)
+        self.load_state_dict(state_dict, assign=True)
@@ -0,0 +1,22 @@
+import torch
+import torch.nn as nn
+from src.models.ensemble import TimeseriesEnsemble
+
+
+class DualEnsemble(nn.Module):
+    # Runs the 15m and 1h ensembles inside one forward so batch-1
+    # prediction pays framework dispatch once, and torch.compile can
+    # fuse across both models
+
+    def __init__(
+        self,
+        model_15m: TimeseriesEnsemble,
+        model_1h: TimeseriesEnsemble
+    ):
+        super().__init__()
+        self.model_15m = model_15m
+        self.model_1h = model_1h
+
+    def forward(self, x_15m, x_1h):
+        # (B, 3) per model, concatenated to (2B, 3)
+        return torch.cat([self.model_15m(x_15m), self.model_1h(x_1h)], dim=0)
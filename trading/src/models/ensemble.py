@@ -3,35 +3,51 @@ import torch.nn as nn
 from src.models.base_model import BaseModel
 
 
+class CausalConv1d(nn.Conv1d):
+    # Left-pads by (kernel_size - 1) * dilation so each output position
+    # only sees the past
+
+    def __init__(self, in_channels, out_channels, kernel_size, dilation=1):
+        super().__init__(
+            in_channels, out_channels, kernel_size, dilation=dilation)
+        self._causal_padding = (kernel_size - 1) * dilation
+
+    def forward(self, x):
+        return super().forward(
+            nn.functional.pad(x, (self._causal_padding, 0)))
+
+
 class TimeseriesEnsemble(BaseModel):
     def __init__(self, input_size, hidden_size):
         super().__init__()
 
-        self.lstm = nn.LSTM(
-            input_size=input_size,
-            hidden_size=hidden_size,
-            num_layers=2,
-            dropout=0.2,
-            batch_first=True
+        # Dilated causal convolutions instead of a recurrent LSTM: the
+        # whole sequence is processed as parallel matmuls, which trace
+        # cleanly under compile and run on tensor cores under autocast
+        self.tcn = nn.Sequential(
+            CausalConv1d(input_size, hidden_size, 3, dilation=1),
+            nn.GELU(),
+            CausalConv1d(hidden_size, hidden_size, 3, dilation=2),
+            nn.GELU(),
+            CausalConv1d(hidden_size, hidden_size, 3, dilation=4)
         )
 
+        # Single projection of the last timestep; the second 64->64
+        # Linear/norm pair added launches without adding capacity
         self.cnn = nn.Sequential(
             nn.Linear(input_size, 64),
             nn.LeakyReLU(),
-            nn.BatchNorm1d(64),
-            nn.Linear(64, 64),
-            nn.LeakyReLU(),
-            nn.BatchNorm1d(64)
+            nn.LayerNorm(64)
         )
 
         self.dnn = nn.Sequential(
             nn.Linear(hidden_size + 64, 128),
             nn.LeakyReLU(),
-            nn.BatchNorm1d(128),
+            nn.LayerNorm(128),
             nn.Dropout(0.3),
             nn.Linear(128, 64),
             nn.LeakyReLU(),
-            nn.BatchNorm1d(64),
+            nn.LayerNorm(64),
             nn.Linear(64, 3)
         )
 
@@ -39,26 +55,23 @@ class TimeseriesEnsemble(BaseModel):
         self.apply(self._init_weights)
 
     def _init_weights(self, m):
-        if isinstance(m, nn.Linear):
+        if isinstance(m, (nn.Linear, nn.Conv1d)):
             nn.init.kaiming_normal_(m.weight)
             if m.bias is not None:
                 nn.init.constant_(m.bias, 0)
 
     def forward(self, x):
-        if len(x.size()) == 2:
-            x = x.unsqueeze(1)
-
-        x = torch.nan_to_num(x, 0.0)
+        # x is (batch, sequence, features); NaNs are cleaned dataset-side
 
-        # LSTM branch
-        lstm_out, _ = self.lstm(x)
-        lstm_last = lstm_out[:, -1, :]
+        # TCN branch over (batch, features, sequence)
+        tcn_out = self.tcn(x.transpose(1, 2))
+        tcn_last = tcn_out[:, :, -1]
 
         # CNN branch
         cnn_out = self.cnn(x[:, -1, :])
 
         # Combine branches
-        combined = torch.cat([lstm_last, cnn_out], dim=1)
+        combined = torch.cat([tcn_last, cnn_out], dim=1)
         logits = self.dnn(combined)
 
         return logits
@@ -1,7 +1,73 @@
 from src.models.ensemble import TimeseriesEnsemble
+from src.models.dual_ensemble import DualEnsemble
+import functools
+import os
 import torch
 import numpy as np
 
+DEVICE = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+# Column order must match the SELECT in MarketDataset._fetch_market_data
+FEATURE_ORDER = (
+    'open', 'close', 'high', 'low', 'volume', 'trades',
+    'rsi_14', 'macd_line', 'macd_signal', 'macd_histogram',
+    'bb_upper', 'bb_middle', 'bb_lower', 'atr_14',
+    'volatility_1h', 'volatility_24h',
+    'price_change_1h', 'price_change_24h',
+    'volume_change_1h', 'volume_change_24h'
+)
+
+
+def _load_checkpoint(path):
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"Checkpoint {path} not found. Checkpoints saved before the "
+            "TCN/LayerNorm rework are incompatible and were removed; "
+            "retrain with src/main.py to regenerate them.")
+    return torch.load(path, map_location=DEVICE, weights_only=True, mmap=True)
+
+
+@functools.lru_cache(maxsize=1)
+def _load_model():
+    # Deserialize and compile once per process, not once per call
+    model_15m = TimeseriesEnsemble(input_size=20, hidden_size=128)
+    model_1h = TimeseriesEnsemble(input_size=20, hidden_size=128)
+
+    model_15m.load_state_dict(_load_checkpoint('models/saved/epoch_0_15m.pth'))
+    model_1h.load_state_dict(_load_checkpoint('models/saved/epoch_0_1h.pth'))
+
+    dual = DualEnsemble(model_15m, model_1h).to(DEVICE).eval()
+    if hasattr(torch, 'compile'):
+        dual = torch.compile(dual, mode="reduce-overhead")
+
+    return dual
+
+
+def candle_to_row(candle):
+    return np.fromiter(
+        (candle[key] for key in FEATURE_ORDER),
+        dtype=np.float32,
+        count=len(FEATURE_ORDER)
+    ).reshape(1, len(FEATURE_ORDER))
+
+
+def _load_session(path):
+    if ort is None or not os.path.exists(path):
+        return None
+    return ort.InferenceSession(
+        path, providers=["CUDAExecutionProvider", "CPUExecutionProvider"])
+
+
+# Fused ONNX Runtime sessions, built once at import from src.export output;
+# predict falls back to eager PyTorch when they are missing
+sess_15m = _load_session('models/saved/epoch_0_15m.onnx')
+sess_1h = _load_session('models/saved/epoch_0_1h.onnx')
+
 last_15m_candle = {
     'open': 20450.50,
     'high': 8890.00,
@@ -50,49 +116,26 @@ last_1h_candle = {
 
 def predict_with_sample():
     # Convert dictionaries to numpy arrays
-    data_15m = np.array([
-        last_15m_candle['open'], last_15m_candle['close'],
-        last_15m_candle['high'], last_15m_candle['low'],
-        last_15m_candle['volume'], last_15m_candle['trades'],
-        last_15m_candle['rsi_14'], last_15m_candle['macd_line'],
-        last_15m_candle['macd_signal'], last_15m_candle['macd_histogram'],
-        last_15m_candle['bb_upper'], last_15m_candle['bb_middle'],
-        last_15m_candle['bb_lower'], last_15m_candle['atr_14'],
-        last_15m_candle['volatility_1h'], last_15m_candle['volatility_24h'],
-        last_15m_candle['price_change_1h'], last_15m_candle['price_change_24h'],
-        last_15m_candle['volume_change_1h'], last_15m_candle['volume_change_24h']
-    ]).reshape(1, 20)  # Reshape to match model input
-
-    data_1h = np.array([
-        last_1h_candle['open'], last_1h_candle['close'],
-        last_1h_candle['high'], last_1h_candle['low'],
-        last_1h_candle['volume'], last_1h_candle['trades'],
-        last_1h_candle['rsi_14'], last_1h_candle['macd_line'],
-        last_1h_candle['macd_signal'], last_1h_candle['macd_histogram'],
-        last_1h_candle['bb_upper'], last_1h_candle['bb_middle'],
-        last_1h_candle['bb_lower'], last_1h_candle['atr_14'],
-        last_1h_candle['volatility_1h'], last_1h_candle['volatility_24h'],
-        last_1h_candle['price_change_1h'], last_1h_candle['price_change_24h'],
-        last_1h_candle['volume_change_1h'], last_1h_candle['volume_change_24h']
-    ]).reshape(1, 20)
-
-    # Convert to PyTorch tensors
-    input_15m = torch.FloatTensor(data_15m)
-    input_1h = torch.FloatTensor(data_1h)
-
-    # Load models
-    model_15m = TimeseriesEnsemble(input_size=20, hidden_size=128)
-    model_1h = TimeseriesEnsemble(input_size=20, hidden_size=128)
+    data_15m = candle_to_row(last_15m_candle)
+    data_1h = candle_to_row(last_1h_candle)
 
-    model_15m.load_state_dict(torch.load('models/saved/epoch_0_15m.pth'))
-    model_1h.load_state_dict(torch.load('models/saved/epoch_0_1h.pth'))
-
-    model_15m.eval()
-    model_1h.eval()
+    # Convert to PyTorch tensors of shape (batch, sequence, features)
+    input_15m = torch.FloatTensor(data_15m).unsqueeze(1)
+    input_1h = torch.FloatTensor(data_1h).unsqueeze(1)
 
     with torch.no_grad():
-        prob_15m = torch.softmax(model_15m(input_15m), dim=1)[0]
-        prob_1h = torch.softmax(model_1h(input_1h), dim=1)[0]
+        if sess_15m is not None and sess_1h is not None:
+            logits_15m = torch.from_numpy(
+                sess_15m.run(None, {'x': input_15m.numpy()})[0])
+            logits_1h = torch.from_numpy(
+                sess_1h.run(None, {'x': input_1h.numpy()})[0])
+        else:
+            dual = _load_model()
+            logits = dual(input_15m.to(DEVICE), input_1h.to(DEVICE))
+            logits_15m, logits_1h = logits[0:1], logits[1:2]
+
+        prob_15m = torch.softmax(logits_15m, dim=1)[0]
+        prob_1h = torch.softmax(logits_1h, dim=1)[0]
 
         combined_probs = {
             'long': (0.4 * prob_15m[0] + 0.6 * prob_1h[0]).item(),
@@ -1,3 +1,4 @@
+import copy
 import torch
 import torch.nn as nn
 import torch.optim as optim
@@ -12,7 +13,10 @@ class DualTimeframeTrainer:
         self,
         model_15m: TimeseriesEnsemble,
         model_1h: TimeseriesEnsemble,
-        learning_rate: float = 1e-4
+        learning_rate: float = 1e-4,
+        compile_models: bool = True,
+        cuda_graphs: bool = True,
+        vmap_models: bool = True
     ):
         self.model_15m = model_15m
         self.model_1h = model_1h
@@ -22,83 +26,282 @@ class DualTimeframeTrainer:
         self.model_15m.to(self.device)
         self.model_1h.to(self.device)
 
+        # Both ensembles share an architecture, so their forwards can run as
+        # one batched kernel call: stack the parameters of the two models and
+        # vmap a functional call over the stacked dimension.
+        self.use_vmap = vmap_models
+        if self.use_vmap:
+            self._base_model = copy.deepcopy(self.model_15m).to('meta')
+            self._stack_params()
+
+            def call_single(params, buffers, x):
+                return torch.func.functional_call(
+                    self._base_model, (params, buffers), (x,))
+
+            self._vmap_forward = torch.vmap(
+                call_single, randomness='different')
+            if compile_models and hasattr(torch, 'compile'):
+                self._vmap_forward = torch.compile(
+                    self._vmap_forward, mode="reduce-overhead")
+        elif compile_models and hasattr(torch, 'compile'):
+            # The ensemble is pure conv/matmul now, so the whole forward
+            # traces into one graph
+            self.model_15m = torch.compile(
+                self.model_15m, mode="reduce-overhead")
+            self.model_1h = torch.compile(
+                self.model_1h, mode="reduce-overhead")
+
+        # Mixed precision: bf16 autocast on the forward/loss, GradScaler on
+        # the backward/step (a no-op on CPU)
+        self.use_amp = self.device.type == 'cuda'
+        self.scaler = torch.cuda.amp.GradScaler(enabled=self.use_amp)
+
         self.criterion = nn.MSELoss()
-        self.optimizer_15m = optim.Adam(
-            self.model_15m.parameters(), lr=learning_rate)
-        self.optimizer_1h = optim.Adam(
-            self.model_1h.parameters(), lr=learning_rate)
+        self.learning_rate = learning_rate
+        # Fused Adam updates every parameter in one kernel on CUDA; one
+        # optimizer owns both models so each step is a single call
+        self.fused_adam = self.device.type == 'cuda'
+        self.optimizer = self._build_optimizer()
+
+        # Explicit CUDA graph capture of the training step. Skipped when the
+        # models are compiled, since reduce-overhead mode already records
+        # CUDA graphs internally.
+        self.use_cuda_graphs = (
+            cuda_graphs
+            and not compile_models
+            and self.device.type == 'cuda'
+        )
+        self._graph = None
+        self._static_batch_15m = None
+        self._static_target_15m = None
+        self._static_batch_1h = None
+        self._static_target_1h = None
+        self._static_loss = None
+
+    def _build_optimizer(self):
+        if self.use_vmap:
+            return optim.Adam(
+                self._stacked_params.values(), lr=self.learning_rate,
+                fused=self.fused_adam)
+
+        return optim.Adam(
+            [
+                {'params': self.model_15m.parameters()},
+                {'params': self.model_1h.parameters()}
+            ],
+            lr=self.learning_rate,
+            fused=self.fused_adam
+        )
+
+    def _stack_params(self):
+        params, buffers = torch.func.stack_module_state(
+            [self.model_15m, self.model_1h])
+        self._stacked_params = {
+            name: p.detach().requires_grad_(True)
+            for name, p in params.items()
+        }
+        self._stacked_buffers = buffers
+
+    def _sync_from_stacked(self):
+        # Write stacked slice i back into model i so state_dicts stay valid
+        state = {**self._stacked_params, **self._stacked_buffers}
+        with torch.no_grad():
+            for i, model in enumerate((self.model_15m, self.model_1h)):
+                model.load_state_dict(
+                    {name: t[i] for name, t in state.items()})
+
+    def _set_train(self, training: bool):
+        self.model_15m.train(training)
+        self.model_1h.train(training)
+        if self.use_vmap:
+            self._base_model.train(training)
 
-    def train_epoch(
+    def _forward_both(
         self,
-        dataloader_15m: DataLoader,
-        dataloader_1h: DataLoader
-    ) -> float:
-        self.model_15m.train()
-        self.model_1h.train()
-        total_loss = 0
+        batch_15m: torch.Tensor,
+        batch_1h: torch.Tensor
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        if self.use_vmap:
+            preds = self._vmap_forward(
+                self._stacked_params,
+                self._stacked_buffers,
+                torch.stack([batch_15m, batch_1h])
+            )
+            return preds[0], preds[1]
 
-        for (batch_15m, target_15m), (batch_1h, target_1h) in zip(dataloader_15m, dataloader_1h):
-            batch_15m, target_15m = batch_15m.to(
-                self.device), target_15m.to(self.device)
-            batch_1h, target_1h = batch_1h.to(
-                self.device), target_1h.to(self.device)
+        return self.model_15m(batch_15m), self.model_1h(batch_1h)
 
-            # Train 15m model
-            self.optimizer_15m.zero_grad()
-            pred_15m = self.model_15m(batch_15m)
-            loss_15m = self.criterion(pred_15m, target_15m)
+    def _all_parameters(self):
+        if self.use_vmap:
+            return list(self._stacked_params.values())
+        return (list(self.model_15m.parameters())
+                + list(self.model_1h.parameters()))
+
+    def warmup(
+        self,
+        batch_size: int = 32,
+        sequence_length: int = 100,
+        input_size: int = 20
+    ):
+        # Run one real _train_step on dummy data so compile, autocast and
+        # the scaler are all warmed in the exact training configuration,
+        # then roll back its side effects
+        dummy_batch = torch.randn(
+            batch_size, sequence_length, input_size, device=self.device)
+        dummy_target = torch.randn(batch_size, 1, device=self.device)
+
+        self._set_train(True)
+
+        if self.use_vmap:
+            saved_params = {
+                name: p.detach().clone()
+                for name, p in self._stacked_params.items()
+            }
+        else:
+            saved_params = copy.deepcopy(
+                (self.model_15m.state_dict(), self.model_1h.state_dict()))
+        saved_optimizer = copy.deepcopy(self.optimizer.state_dict())
+        saved_scaler = copy.deepcopy(self.scaler.state_dict())
+
+        self._train_step(dummy_batch, dummy_target, dummy_batch, dummy_target)
+
+        with torch.no_grad():
+            if self.use_vmap:
+                for name, p in self._stacked_params.items():
+                    p.copy_(saved_params[name])
+            else:
+                self.model_15m.load_state_dict(saved_params[0])
+                self.model_1h.load_state_dict(saved_params[1])
+        self.optimizer.load_state_dict(saved_optimizer)
+        self.scaler.load_state_dict(saved_scaler)
+        self.optimizer.zero_grad(set_to_none=True)
+
+    def _train_step(
+        self,
+        batch_15m: torch.Tensor,
+        target_15m: torch.Tensor,
+        batch_1h: torch.Tensor,
+        target_1h: torch.Tensor
+    ) -> torch.Tensor:
+        self.optimizer.zero_grad(set_to_none=True)
 
-            # Train 1h model
-            self.optimizer_1h.zero_grad()
-            pred_1h = self.model_1h(batch_1h)
+        with torch.autocast(
+            device_type=self.device.type,
+            dtype=torch.bfloat16,
+            enabled=self.use_amp
+        ):
+            pred_15m, pred_1h = self._forward_both(batch_15m, batch_1h)
+            loss_15m = self.criterion(pred_15m, target_15m)
             loss_1h = self.criterion(pred_1h, target_1h)
 
             # Combined loss with higher weight for 1h timeframe
             loss = 0.4 * loss_15m + 0.6 * loss_1h
-            loss.backward()
 
-            # Add gradient clipping
-            torch.nn.utils.clip_grad_norm_(self.model_15m.parameters(), 1.0)
-            torch.nn.utils.clip_grad_norm_(self.model_1h.parameters(), 1.0)
+        self.scaler.scale(loss).backward()
 
-            self.optimizer_15m.step()
-            self.optimizer_1h.step()
+        # Add gradient clipping on unscaled gradients, one reduction over
+        # the combined parameter list
+        self.scaler.unscale_(self.optimizer)
+        torch.nn.utils.clip_grad_norm_(self._all_parameters(), 1.0)
 
-            total_loss += loss.item()
+        self.scaler.step(self.optimizer)
+        self.scaler.update()
 
-        return total_loss / len(dataloader_15m)
+        return loss
 
-    def validate(
+    def _capture_train_step(
         self,
-        dataloader_15m: DataLoader,
-        dataloader_1h: DataLoader
-    ) -> float:
-        self.model_15m.eval()
-        self.model_1h.eval()
+        batch_15m: torch.Tensor,
+        target_15m: torch.Tensor,
+        batch_1h: torch.Tensor,
+        target_1h: torch.Tensor
+    ):
+        self._static_batch_15m = batch_15m.clone()
+        self._static_target_15m = target_15m.clone()
+        self._static_batch_1h = batch_1h.clone()
+        self._static_target_1h = target_1h.clone()
+
+        # Warmup on a side stream to stabilize cuDNN and the allocator
+        stream = torch.cuda.Stream()
+        stream.wait_stream(torch.cuda.current_stream())
+        with torch.cuda.stream(stream):
+            for _ in range(3):
+                self._train_step(
+                    self._static_batch_15m, self._static_target_15m,
+                    self._static_batch_1h, self._static_target_1h
+                )
+        torch.cuda.current_stream().wait_stream(stream)
+
+        self._graph = torch.cuda.CUDAGraph()
+        with torch.cuda.graph(self._graph):
+            self._static_loss = self._train_step(
+                self._static_batch_15m, self._static_target_15m,
+                self._static_batch_1h, self._static_target_1h
+            )
+
+    def train_epoch(self, dataloader: DataLoader) -> float:
+        self._set_train(True)
+        total_loss = 0
+
+        for batch_15m, target_15m, batch_1h, target_1h in dataloader:
+            batch_15m = batch_15m.to(self.device, non_blocking=True)
+            target_15m = target_15m.to(self.device, non_blocking=True)
+            batch_1h = batch_1h.to(self.device, non_blocking=True)
+            target_1h = target_1h.to(self.device, non_blocking=True)
+
+            if self.use_cuda_graphs:
+                if self._graph is None:
+                    self._capture_train_step(
+                        batch_15m, target_15m, batch_1h, target_1h)
+
+                if batch_15m.shape == self._static_batch_15m.shape:
+                    self._static_batch_15m.copy_(batch_15m, non_blocking=True)
+                    self._static_target_15m.copy_(
+                        target_15m, non_blocking=True)
+                    self._static_batch_1h.copy_(batch_1h, non_blocking=True)
+                    self._static_target_1h.copy_(target_1h, non_blocking=True)
+                    self._graph.replay()
+                    total_loss += self._static_loss.item()
+                    continue
+
+                # Ragged last batch does not match the captured shapes
+                loss = self._train_step(
+                    batch_15m, target_15m, batch_1h, target_1h)
+            else:
+                loss = self._train_step(
+                    batch_15m, target_15m, batch_1h, target_1h)
+
+            total_loss += loss.item()
+
+        return total_loss / len(dataloader)
+
+    def validate(self, dataloader: DataLoader) -> float:
+        self._set_train(False)
         total_loss = 0
 
         with torch.no_grad():
-            for (batch_15m, target_15m), (batch_1h, target_1h) in zip(dataloader_15m, dataloader_1h):
-                batch_15m, target_15m = batch_15m.to(
-                    self.device), target_15m.to(self.device)
-                batch_1h, target_1h = batch_1h.to(
-                    self.device), target_1h.to(self.device)
+            for batch_15m, target_15m, batch_1h, target_1h in dataloader:
+                batch_15m = batch_15m.to(self.device, non_blocking=True)
+                target_15m = target_15m.to(self.device, non_blocking=True)
+                batch_1h = batch_1h.to(self.device, non_blocking=True)
+                target_1h = target_1h.to(self.device, non_blocking=True)
 
-                pred_15m = self.model_15m(batch_15m)
+                pred_15m, pred_1h = self._forward_both(batch_15m, batch_1h)
                 loss_15m = self.criterion(pred_15m, target_15m)
-
-                pred_1h = self.model_1h(batch_1h)
                 loss_1h = self.criterion(pred_1h, target_1h)
 
                 loss = 0.4 * loss_15m + 0.6 * loss_1h
                 total_loss += loss.item()
 
-        return total_loss / len(dataloader_15m)
+        return total_loss / len(dataloader)
 
     def save_models(self, path: str, prefix: str):
         if not os.path.exists(path):
             os.makedirs(path)
 
+        if self.use_vmap:
+            self._sync_from_stacked()
+
         torch.save(
             self.model_15m.state_dict(),
             os.path.join(path, f"{prefix}_15m.pth")
@@ -110,8 +313,21 @@ class DualTimeframeTrainer:
 
     def load_models(self, path: str, prefix: str):
         self.model_15m.load_state_dict(
-            torch.load(os.path.join(path, f"{prefix}_15m.pth"))
+            torch.load(os.path.join(path, f"{prefix}_15m.pth"),
+                       map_location=self.device,
+                       weights_only=True, mmap=True),
+            assign=True
         )
         self.model_1h.load_state_dict(
-            torch.load(os.path.join(path, f"{prefix}_1h.pth"))
+            torch.load(os.path.join(path, f"{prefix}_1h.pth"),
+                       map_location=self.device,
+                       weights_only=True, mmap=True),
+            assign=True
         )
+
+        if self.use_vmap:
+            self._stack_params()
+
+        # assign=True swaps the parameter tensors, so the optimizer must be
+        # rebuilt over the fresh leaves
+        self.optimizer = self._build_optimizer()